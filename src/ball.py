@@ -13,6 +13,7 @@ class Ball(pygame.sprite.Sprite):
         self.xSpeed = 10
         self.ySpeed = 10
         self.boost = False
+        self.owner = None  # index of the last player to hit the ball, None until someone does
         self.rect = pygame.Rect(xCenter - self.radius, yCenter - self.radius,
                                 2 * self.radius, 2 * self.radius)
         self.image = pygame.Surface((2 * self.radius, 2 * self.radius), 
@@ -32,13 +33,15 @@ class Ball(pygame.sprite.Sprite):
     def update(self, screenWidth, screenHeight):
         self.xCenter += self.xSpeed
         self.yCenter += self.ySpeed
-        if self.xCenter < 0:
+        # only turn around when heading out, a cursor can knock the ball past
+        # the edge and flipping again there would keep it outside
+        if self.xCenter < 0 and self.xSpeed < 0:
             self.xSpeed*=-1
-        elif self.xCenter > screenWidth:
+        elif self.xCenter > screenWidth and self.xSpeed > 0:
             self.xSpeed*=-1
-        if self.yCenter < 0:
+        if self.yCenter < 0 and self.ySpeed < 0:
             self.ySpeed*=-1
-        elif self.yCenter > screenHeight:
+        elif self.yCenter > screenHeight and self.ySpeed > 0:
             self.ySpeed*=-1
         self.getRect()
     
@@ -0,0 +1,241 @@
+# streams the match to read-only spectators over local TCP
+import collections
+import socket
+import struct
+
+import snapshot
+
+#OVERVIEW:
+#server = SpectatorServer(port=5112) starts listening for spectators
+#server.broadcast(game) once per tick encodes the match once (snapshot.packMatch,
+#so no rng state) and hands the same bytes to every spectator
+#server.close() when the game ends
+#
+#on the wire every frame is a 4 byte little endian length and then the frame.
+#spectators read one with recvFrame(sock) and turn it into plain values with
+#snapshot.decodeMatch(frame), spectator.py is a window that does exactly that
+#
+#the sockets are non-blocking and each spectator has its own small queue of
+#frames that haven't gone out yet. If a spectator reads too slowly its queue
+#fills up and the old frames get thrown away (every frame is the full state,
+#so only the newest one matters) instead of making the game wait.
+
+_LENGTH = struct.Struct("<I")
+
+
+class Spectator(object):
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.queue = collections.deque()
+        #true when the first frame in the queue is half sent
+        self.partial = False
+        self.dropped = 0
+
+
+class SpectatorServer(object):
+    def __init__(self, host="127.0.0.1", port=5112, maxPending=4, backlog=128):
+        self.maxPending = maxPending
+        self.spectators = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(backlog)
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+
+    def accept(self):
+        while True:
+            try:
+                sock, address = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.spectators.append(Spectator(sock, address))
+
+    def broadcast(self, game):
+        self.publish(snapshot.packMatch(game))
+
+    def publish(self, frame):
+        self.accept()
+        #built once, every spectator gets a view of the same buffer
+        packet = memoryview(_LENGTH.pack(len(frame)) + frame)
+        gone = []
+        for s in self.spectators:
+            if len(s.queue) >= self.maxPending:
+                head = s.queue[0] if s.partial else None
+                s.dropped += len(s.queue) - (head is not None)
+                s.queue.clear()
+                if head is not None:
+                    s.queue.append(head)
+            s.queue.append(packet)
+            if not self.flush(s):
+                gone.append(s)
+        for s in gone:
+            self.drop(s)
+
+    #sends as much as the socket takes right now, returns False if the
+    #spectator went away
+    def flush(self, s):
+        while s.queue:
+            try:
+                n = s.sock.send(s.queue[0])
+            except (BlockingIOError, InterruptedError):
+                return True
+            except OSError:
+                return False
+            if n < len(s.queue[0]):
+                s.queue[0] = s.queue[0][n:]
+                s.partial = True
+                return True
+            s.queue.popleft()
+            s.partial = False
+        return True
+
+    def drop(self, s):
+        self.spectators.remove(s)
+        s.sock.close()
+
+    def close(self):
+        for s in self.spectators:
+            s.sock.close()
+        self.spectators = []
+        self.sock.close()
+
+
+#blocking read of one frame, for spectators
+def recvFrame(sock):
+    header = _recvExactly(sock, _LENGTH.size)
+    if header is None:
+        return None
+    return _recvExactly(sock, _LENGTH.unpack(header)[0])
+
+
+def _recvExactly(sock, n):
+    data = bytearray(n)
+    view = memoryview(data)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            return None
+        got += k
+    return bytes(data)
+
+
+if __name__ == '__main__':
+    #loopback load test: python broadcast.py [spectators] [ticks]
+    import os
+    import selectors
+    import sys
+    import time
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    import main
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    #one tick at 50 fps
+    budget = 1.0 / 50
+
+    #a real 8 player match, the tick number rides along in the first score
+    #so the readers can tell which frame they got
+    game = main.BallHogz(1200, 800, numPlayers=8)
+    screen = pygame.display.set_mode((game.width, game.height))
+    game.init()
+    game.drawBalls(screen)
+    game.drawGoals(screen)
+    game.s.mode = "game"
+
+    server = SpectatorServer(port=0)
+    clients = []
+    for i in range(count):
+        c = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        c.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        c.connect(server.address)
+        clients.append(c)
+        server.accept()
+    #every tenth spectator never reads anything
+    slow = set(range(0, count, 10))
+    readers = selectors.DefaultSelector()
+    buffers = {}
+    for i, c in enumerate(clients):
+        if i not in slow:
+            c.setblocking(False)
+            readers.register(c, selectors.EVENT_READ, i)
+            buffers[i] = b""
+
+    while len(server.spectators) < count:
+        server.accept()
+    #small kernel buffers so the slow spectators fill up quickly
+    for s in server.spectators:
+        s.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 8192)
+    slowAddresses = set(clients[i].getsockname() for i in slow)
+    slowSpectators = [s for s in server.spectators if s.address in slowAddresses]
+    latest = {}
+
+    def read(key):
+        try:
+            buf = buffers[key.data] + key.fileobj.recv(1 << 16)
+        except BlockingIOError:
+            return
+        #skip to the newest whole frame and keep whatever comes after it
+        last = None
+        offset = 0
+        while len(buf) - offset >= _LENGTH.size:
+            n = _LENGTH.unpack_from(buf, offset)[0]
+            if len(buf) - offset - _LENGTH.size < n:
+                break
+            last = (offset + _LENGTH.size, offset + _LENGTH.size + n)
+            offset = last[1]
+        if last is not None:
+            latest[key.data] = snapshot.decodeMatch(buf[last[0]:last[1]])["scores"][0]
+        buffers[key.data] = buf[offset:]
+
+    def tick(n):
+        game.scores[0] = n
+        t = time.perf_counter()
+        server.broadcast(game)
+        return time.perf_counter() - t
+
+    worst = 0
+    start = time.perf_counter()
+    for n in range(ticks):
+        #move everything like a tick of the game would, without timerFired's
+        #scoring since the first score is the tick number here
+        game.moveCursors()
+        game.goals.update(game.width, game.height)
+        game.balls.update(game.width, game.height)
+        worst = max(worst, tick(n))
+        for key, events in readers.select(0):
+            read(key)
+    total = time.perf_counter() - start
+
+    #keep sending the last frame until the readers have caught up with it
+    deadline = time.time() + 5
+    caughtUp = lambda: sum(1 for n in latest.values() if n == ticks)
+    while time.time() < deadline and caughtUp() < len(buffers):
+        worst = max(worst, tick(ticks))
+        for key, events in readers.select(0.01):
+            read(key)
+
+    print("%d spectators (%d never read), %d ticks, %d byte frames" %
+          (count, len(slow), ticks, len(snapshot.packMatch(game))))
+    print("tick incl. readers: %.3f ms average, broadcast worst %.3f ms" %
+          (total / ticks * 1000, worst * 1000))
+    print("readers that got the latest frame: %d/%d" % (caughtUp(), len(buffers)))
+    print("frames dropped for slow spectators: %d" %
+          sum(s.dropped for s in slowSpectators))
+
+    assert len(server.spectators) == count, "spectators were disconnected"
+    assert len(slowSpectators) == len(slow)
+    assert caughtUp() == len(buffers), "some readers never got the last frame"
+    assert all(s.dropped > 0 for s in slowSpectators), \
+        "slow spectators kept every frame, backpressure never kicked in"
+    assert worst < budget, "a broadcast took %.1f ms, over the %.0f ms tick" % \
+        (worst * 1000, budget * 1000)
+    for c in clients:
+        c.close()
+    server.close()
@@ -8,20 +8,36 @@ created by Lukas Peraza
     in case you don't need to update the entire display every frame (then you
     should use pygame.display.update(Rect) instead)
 '''
+import sys
+import math
 import pygame
 import socket
 import scene
 import goal
 import player
 import ball
+import broadcast
+import snapshot
 
 class BallHogz(object):
 	
 	def init(self):
 		self.moving = True
 		self.s = scene.Scene(self.width, self.height, self.moving,"start", False)
-		self.scores = [0,0]
-		self.p1 = player.Player(0,0)
+		#player 1 is the mouse, the next ones use any joysticks plugged in and
+		#whoever is left over is a bot that chases the ball
+		self.players = [player.Player(0,0, player.playerColor(i))
+			for i in range(self.numPlayers)]
+		self.p1 = self.players[0]
+		self.scores = [0] * self.numPlayers
+		#ticks left that each bot spends backing off after it hit the ball
+		self.cooldowns = [0] * self.numPlayers
+		pygame.joystick.init()
+		self.joysticks = []
+		for i in range(min(pygame.joystick.get_count(), self.numPlayers - 1)):
+			stick = pygame.joystick.Joystick(i)
+			stick.init()
+			self.joysticks.append(stick)
 		self.goals = pygame.sprite.Group()
 		self.goalsDrawn = False
 		self.balls = pygame.sprite.Group()
@@ -75,26 +91,69 @@ class BallHogz(object):
 		elif keyCode == 109 and self.s.mode=="start":
 			self.moving = not self.moving
 			self.s.moving = not self.s.moving
+		elif keyCode == 99:
+			self.maskCollisions = not self.maskCollisions
 
 	def keyReleased(self, keyCode, modifier):
 		pass
 
+	def joyButtonPressed(self, joy, button):
+		#joystick n drives player n+1
+		if joy + 1 >= len(self.players): return
+		p = self.players[joy + 1]
+		if button == 0:
+			p.rotateLeft()
+		elif button == 1:
+			p.rotateRight()
+		elif button == 2:
+			p.scale(1)
+		elif button == 3:
+			p.scale(-1)
+
+	def moveCursors(self):
+		balls = self.balls.sprites()
+		for i in range(1, len(self.players)):
+			p = self.players[i]
+			if i - 1 < len(self.joysticks):
+				stick = self.joysticks[i - 1]
+				p.update(p.x + stick.get_axis(0) * self.cursorSpeed,
+					p.y + stick.get_axis(1) * self.cursorSpeed)
+			elif len(balls) > 0:
+				b = balls[i % len(balls)]
+				#every bot comes at the ball from its own side so they don't all
+				#pile up on the same spot, and after a hit it backs off that way
+				a = 2 * math.pi * i / len(self.players)
+				if self.cooldowns[i] > 0:
+					self.cooldowns[i] -= 1
+					reach = self.botBackoff
+				else:
+					reach = b.radius / 2
+				x = min(max(b.xCenter + math.cos(a) * reach, 0), self.width)
+				y = min(max(b.yCenter + math.sin(a) * reach, 0), self.height)
+				p.chase(x, y, self.cursorSpeed)
+
 	def timerFired(self, dt, screen):
-		def isGoalCollision(balls, goal):
-			collided = False
-			a = pygame.sprite.spritecollideany(balls.sprites()[0], goal, collided)
-			return a
+		if self.s.mode == "game" and not self.s.paused:
+			self.moveCursors()
 
-		angle = self.p1.getCollision(screen, self.balls.sprites()[0].getLocation()[0], self.balls.sprites()[0].getLocation()[1], self.balls.sprites()[0].radius)
-		if angle != None:
-			self.balls.sprites()[0].bounce(angle)
+		if self.maskCollisions:
+			hits = player.getMaskCollisions(self.players, self.balls.sprites())
+		else:
+			hits = player.getCollisions(self.players, self.balls.sprites())
+		for i, b, angle in hits:
+			b.owner = i
+			b.bounce(angle)
+			self.cooldowns[i] = self.botCooldown
 
-		if isGoalCollision(self.balls, self.goals) != None:
-			if isGoalCollision(self.balls, self.goals) == self.goals.sprites()[1]:
-				self.scores[0] -= 1
-			elif isGoalCollision(self.balls, self.goals) == self.goals.sprites()[0]: 
-				self.scores[0] += 1
-		if self.scores[0] >=10 or self.scores[1] >=10:
+		#whoever touched the ball last gets the point
+		for b in self.balls.sprites():
+			hit = pygame.sprite.spritecollideany(b, self.goals)
+			if hit != None and b.owner is not None:
+				if hit == self.goals.sprites()[1]:
+					self.scores[b.owner] -= 1
+				elif hit == self.goals.sprites()[0]:
+					self.scores[b.owner] += 1
+		if max(self.scores) >= 10:
 			print("hi")
 			self.mode = "end"
 			self.paused = True
@@ -151,20 +210,34 @@ class BallHogz(object):
 				self.goals.draw(screen)
 				self.balls.update(self.width,self.height)
 				self.balls.draw(screen)
-			self.p1.draw(screen)
+			for p in self.players:
+				p.draw(screen)
 
 
 	def isKeyPressed(self, key):
 		''' return whether a specific key is being held '''
 		return self._keys.get(key, False)
 
-	def __init__(self, width=600, height=400, fps=50, title="Welcome to Ball Hogz!"):
+	def __init__(self, width=600, height=400, fps=50, title="Welcome to Ball Hogz!", numPlayers=1, spectatorPort=None):
 
 		self.goals = None
 		self.width = width
 		self.height = height
 		self.fps = fps
 		self.title = title
+		#snapshots and spectator frames count the players in a byte
+		if not 1 <= numPlayers <= snapshot.MAX_PLAYERS:
+			raise ValueError("numPlayers has to be between 1 and %d, not %r"
+				% (snapshot.MAX_PLAYERS, numPlayers))
+		self.numPlayers = numPlayers
+		self.spectatorPort = spectatorPort
+		self.spectators = None
+		#'c' switches ball vs cursor hits between the edge math and pixel masks
+		self.maskCollisions = False
+		self.cursorSpeed = 12
+		#after hitting the ball a bot spends this many ticks heading this far away
+		self.botCooldown = 25
+		self.botBackoff = 150
 		self.bgColor = (255, 255, 255)
 		self.goalWidth = self.height*.05
 		self.goalHeight = self.width*.05
@@ -218,6 +291,9 @@ class BallHogz(object):
 		self.init()
 	
 		self.drawBalls(screen)
+
+		if self.spectatorPort is not None:
+			self.spectators = broadcast.SpectatorServer(port=self.spectatorPort)
 		
 		pygame.mixer.music.load("../Music.mp3")
 		pygame.mixer.music.play(-1)
@@ -226,6 +302,8 @@ class BallHogz(object):
 		while playing:
 			time = clock.tick(self.fps)
 			self.timerFired(time, screen)
+			if self.spectators is not None:
+				self.spectators.broadcast(self)
 			for event in pygame.event.get():
 				if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
 					if(not self.goalsDrawn):
@@ -246,16 +324,28 @@ class BallHogz(object):
 				elif event.type == pygame.KEYUP:
 					self._keys[event.key] = False
 					self.keyReleased(event.key, event.mod)
+				elif event.type == pygame.JOYBUTTONDOWN:
+					self.joyButtonPressed(event.joy, event.button)
 				elif event.type == pygame.QUIT:
 					playing = False
 			screen.fill(self.bgColor)
 			self.redrawAll(screen)
 			pygame.display.flip()
 
+		if self.spectators is not None:
+			self.spectators.close()
 		pygame.quit()
 
 def main():
-    game = BallHogz()
+    #python3 main.py 4 plays with 4 cursors, python3 main.py 4 5112 also
+    #streams the match to spectators on port 5112
+    try:
+        numPlayers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+        spectatorPort = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        game = BallHogz(numPlayers=numPlayers, spectatorPort=spectatorPort)
+    except ValueError as e:
+        sys.exit("usage: python3 main.py [players 1-%d] [spectator port]\n%s"
+                 % (snapshot.MAX_PLAYERS, e))
     game.run()
 
 if __name__ == '__main__':
@@ -1,55 +1,157 @@
 import math
 import cmath
+import colorsys
+import random
 import pygame
 
+#one color per local cursor, player 1 keeps the original black
+COLORS = [(0,0,0), (200,30,30), (30,30,200), (30,160,30),
+	(160,30,160), (230,130,0), (0,150,150), (120,120,120)]
+
+#the fixed colors first, after that hues spread out by the golden angle
+def playerColor(i):
+	if i < len(COLORS):
+		return COLORS[i]
+	r, g, b = colorsys.hsv_to_rgb((i * 0.381966) % 1.0, 0.75, 0.8)
+	return (int(r * 255), int(g * 255), int(b * 255))
+
+#the sizes scale() allows and the 8 directions rotateLeft/Right can point in
+SIZES = range(25, 150, 25)
+TURNS = 8
+
+#the arrow shape with its tip at (0, 0)
+def outline(size):
+	return [(0,0), (0,size),
+		(size//4,(size*3)//4),
+		((size*19)//40, (size*5)//4),
+		((size*32)//50,(size*47)//40),
+		((size*21)//50,(size*27)//40),
+		((size*48)//60,(size*27)//40)]
+
+#every size x rotation x color gets drawn once onto its own surface along
+#with a mask, so drawing the cursor is just a blit.
+#(size, turn, color) -> (surface, mask, x offset of the tip, y offset of the tip)
+_sprites = {}
+#radius -> mask of a ball
+_ballMasks = {}
+
+#the outline turned by turn pi/4 steps around the tip. Rounding gets rid of
+#float noise like -25.000000001 that would otherwise push the shape over by
+#a pixel, Player.L and the sprites are both built from this
+def turnedOutline(size, turn):
+	rot = cmath.exp((math.pi/4)*turn*1j)
+	points = [rot * complex(px, py) for px, py in outline(size)]
+	return [(round(p.real, 9), round(p.imag, 9)) for p in points]
+
+def getSprite(size, turn, color):
+	key = (size, turn, color)
+	if key not in _sprites:
+		points = [complex(px, py) for px, py in turnedOutline(size, turn)]
+		left = int(math.floor(min(p.real for p in points)))
+		top = int(math.floor(min(p.imag for p in points)))
+		w = int(math.ceil(max(p.real for p in points))) - left + 1
+		h = int(math.ceil(max(p.imag for p in points))) - top + 1
+		#a colorkey instead of per pixel alpha, RLE colorkey blits are a lot
+		#cheaper than alpha blending
+		background = (255,0,255) if tuple(color) != (255,0,255) else (0,255,0)
+		surface = pygame.Surface((w, h))
+		surface.fill(background)
+		pygame.draw.polygon(surface, pygame.Color(*color),
+			[(p.real - left, p.imag - top) for p in points])
+		surface.set_colorkey(background, pygame.RLEACCEL)
+		_sprites[key] = (surface, pygame.mask.from_surface(surface), left, top)
+	return _sprites[key]
+
+#blits the cached sprite with the cursor's tip at (x, y)
+def drawCursor(screen, size, turn, color, x, y):
+	sprite, mask, left, top = getSprite(size, turn, color)
+	screen.blit(sprite, (round(x) + left, round(y) + top))
+
+def prerender(color):
+	for size in SIZES:
+		for turn in range(TURNS):
+			getSprite(size, turn, color)
+
+def getBallMask(radius):
+	if radius not in _ballMasks:
+		surface = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+		pygame.draw.circle(surface, (255,255,255), (radius, radius), radius)
+		_ballMasks[radius] = pygame.mask.from_surface(surface)
+	return _ballMasks[radius]
+
 class Player(object):
-	def __init__(self, x, y):
+	def __init__(self, x, y, color=(0,0,0)):
 		self.angle = 0
+		#how many pi/4 steps the cursor is turned, picks the sprite to draw
+		self.turn = 0
 		self.x = x
 		self.y = y
 		self.size = 25
-		self.L = [(self.x,self.y), (self.x,self.y+self.size),
-			(self.x+self.size//4,self.y+(self.size*3)//4),
-			(self.x+(self.size*19)//40, self.y+(self.size*5)//4),
-			(self.x+(self.size*32)//50,self.y+(self.size*47)//40),
-			(self.x+(self.size*21)//50,self.y+(self.size*27)//40),
-			(self.x+(self.size*48)//60,self.y+(self.size*27)//40)]
+		self.color = color
+		#all 40 sprites of a color are about 1MB, so only the fixed colors get
+		#drawn up front. Generated ones are drawn the first time they're needed
+		if color in COLORS:
+			prerender(color)
+		self.rebuild()
+
+	#L is always worked out again from the size and turn instead of being
+	#rotated step by step, so it never drifts away from the sprite
+	def rebuild(self):
+		self.L = [(self.x+px, self.y+py) for px, py in turnedOutline(self.size, self.turn)]
 
 	def rotateLeft(self):
 		self.angle = cmath.exp((math.pi/4)*1j)
-		center = complex(self.L[0][0],self.L[0][1])
-		for i in range(1,len(self.L)):
-			v = self.angle * (complex(self.L[i][0], self.L[i][1]) - center) + center
-			self.L[i]= (v.real, v.imag)
+		self.turn = (self.turn + 1) % TURNS
+		self.rebuild()
 
 	def rotateRight(self):
 		self.angle = cmath.exp((math.pi/4)*-1j)
-		center = complex(self.L[0][0],self.L[0][1])
-		for i in range(1,len(self.L)):
-			v = self.angle * (complex(self.L[i][0], self.L[i][1]) - center) + center
-			self.L[i]= (v.real, v.imag)
+		self.turn = (self.turn - 1) % TURNS
+		self.rebuild()
 
 	def scale(self, factor):
 		if 0 < self.size + factor*25 < 150: 
 			self.size += factor * 25
-		self.L = [(self.x,self.y), (self.x,self.y+self.size),
-			(self.x+self.size//4,self.y+(self.size*3)//4),
-			(self.x+(self.size*19)//40, self.y+(self.size*5)//4),
-			(self.x+(self.size*32)//50,self.y+(self.size*47)//40),
-			(self.x+(self.size*21)//50,self.y+(self.size*27)//40),
-			(self.x+(self.size*48)//60,self.y+(self.size*27)//40)]
+		self.turn = 0
+		self.rebuild()
 
 
+	#the cursor sits on whole pixels like the mouse does, so bots and joysticks
+	#moving it by fractions still line up L with the sprite and its mask
 	def update(self, x, y):
+		self.x = int(round(x))
+		self.y = int(round(y))
+		self.rebuild()
+
+	#moves the cursor towards (x, y) by at most speed pixels, used by bots
+	#and joysticks that don't report absolute positions like the mouse does
+	def chase(self, x, y, speed):
 		dx = x - self.x
 		dy = y - self.y
-		self.x = x
-		self.y = y
-		for i in range(len(self.L)):
-			self.L[i] = (self.L[i][0] + dx, self.L[i][1] + dy) 
+		d = math.sqrt(dx**2 + dy**2)
+		if d > speed:
+			dx = dx * speed / d
+			dy = dy * speed / d
+		self.update(self.x + dx, self.y + dy)
 
 	def draw(self, screen):
-		pygame.draw.polygon(screen, pygame.Color(0,0,0), self.L)
+		drawCursor(screen, self.size, self.turn, self.color, self.x, self.y)
+
+	#pixel test against a ball using the cached masks, returns the point
+	#where they overlap in screen coordinates or None
+	def getMaskCollision(self, x, y, r):
+		sprite, mask, left, top = getSprite(self.size, self.turn, self.color)
+		sx = round(self.x) + left
+		sy = round(self.y) + top
+		bx = int(x) - r
+		by = int(y) - r
+		if (bx > sx + sprite.get_width() or bx + 2*r < sx or
+			by > sy + sprite.get_height() or by + 2*r < sy):
+			return None
+		point = mask.overlap(getBallMask(r), (bx - sx, by - sy))
+		if point is None:
+			return None
+		return (sx + point[0], sy + point[1])
 
 
 	def getCollision(self, screen, x,y,r):
@@ -124,3 +226,148 @@ class Player(object):
 #
 				return ang
 
+
+#checks every ball against every cursor in one pass instead of calling
+#getCollision once per player. All the edges get flattened into one table up
+#front (start point, direction, 1/length^2 and which player they belong to),
+#and each ball only looks at the edges of cursors whose bounding box it touches.
+#returns a list of (playerIndex, ball, angle) with at most one hit per ball,
+#angle is the direction from the contact point to the ball's center. When
+#cursors are stacked and equally close one of them is picked at random, so
+#the lowest index doesn't always get the ball
+def getCollisions(players, balls):
+	ax, ay, ex, ey, inv, owner = [], [], [], [], [], []
+	boxes = []
+	for n, p in enumerate(players):
+		L = p.L
+		xs = [pt[0] for pt in L]
+		ys = [pt[1] for pt in L]
+		boxes.append((min(xs), min(ys), max(xs), max(ys)))
+		for i in range(-1, len(L) - 1):
+			dx = L[i+1][0] - L[i][0]
+			dy = L[i+1][1] - L[i][1]
+			l2 = dx*dx + dy*dy
+			if l2 == 0: continue
+			ax.append(L[i][0])
+			ay.append(L[i][1])
+			ex.append(dx)
+			ey.append(dy)
+			inv.append(1.0 / l2)
+			owner.append(n)
+
+	hits = []
+	for b in balls:
+		x, y, r = b.xCenter, b.yCenter, b.radius
+		near = [box[0] - r <= x <= box[2] + r and box[1] - r <= y <= box[3] + r
+			for box in boxes]
+		if not any(near): continue
+		ties, bestD = [], r*r
+		for k in range(len(ax)):
+			if not near[owner[k]]: continue
+			t = ((x - ax[k])*ex[k] + (y - ay[k])*ey[k]) * inv[k]
+			if t < 0: t = 0
+			elif t > 1: t = 1
+			cx = ax[k] + t*ex[k]
+			cy = ay[k] + t*ey[k]
+			d = (x - cx)**2 + (y - cy)**2
+			if d < bestD - 1e-9:
+				ties, bestD = [(owner[k], cx, cy)], d
+			elif d <= bestD + 1e-9 and ties and all(o != owner[k] for o, px, py in ties):
+				ties.append((owner[k], cx, cy))
+		if ties:
+			n, cx, cy = ties[0] if len(ties) == 1 else random.choice(ties)
+			hits.append((n, b, math.atan2(y - cy, x - cx)))
+	return hits
+
+#same thing as getCollisions but with the pixel masks instead of the edges,
+#masks don't give a distance so any cursor touching the ball can get it
+def getMaskCollisions(players, balls):
+	hits = []
+	for b in balls:
+		touching = []
+		for n, p in enumerate(players):
+			point = p.getMaskCollision(b.xCenter, b.yCenter, b.radius)
+			if point is not None:
+				touching.append((n, point))
+		if touching:
+			n, point = touching[0] if len(touching) == 1 else random.choice(touching)
+			hits.append((n, b, math.atan2(b.yCenter - point[1], b.xCenter - point[0])))
+	return hits
+
+
+if __name__ == '__main__':
+	#quick benchmark: python player.py
+	import timeit
+
+	class _Ball(object):
+		def __init__(self, x, y):
+			self.xCenter, self.yCenter, self.radius = x, y, 20
+
+	def makePlayers(count):
+		players = [Player(0,0, playerColor(i)) for i in range(count)]
+		for p in players:
+			p.update(random.randint(0, 1200), random.randint(0, 800))
+			p.scale(random.randint(0, 4))
+			for i in range(random.randint(0, TURNS - 1)):
+				p.rotateLeft()
+		return players
+
+	#the same clamped segment test as getCollisions, one cursor and ball at a
+	#time, so the difference is only the batching (and the box check if cull)
+	def segmentHit(p, x, y, r, cull):
+		L = p.L
+		if cull:
+			xs = [pt[0] for pt in L]
+			ys = [pt[1] for pt in L]
+			if not (min(xs) - r <= x <= max(xs) + r and min(ys) - r <= y <= max(ys) + r):
+				return None
+		best = None
+		bestD = r*r
+		for i in range(-1, len(L) - 1):
+			dx = L[i+1][0] - L[i][0]
+			dy = L[i+1][1] - L[i][1]
+			l2 = dx*dx + dy*dy
+			if l2 == 0: continue
+			t = ((x - L[i][0])*dx + (y - L[i][1])*dy) / l2
+			t = min(max(t, 0), 1)
+			cx = L[i][0] + t*dx
+			cy = L[i][1] + t*dy
+			d = (x - cx)**2 + (y - cy)**2
+			if d < bestD:
+				best, bestD = (cx, cy), d
+		return best
+
+	def unbatched(players, cull):
+		for b in balls:
+			for p in players:
+				segmentHit(p, b.xCenter, b.yCenter, b.radius, cull)
+
+	def oldMath(players):
+		for b in balls:
+			for p in players:
+				p.getCollision(None, b.xCenter, b.yCenter, b.radius)
+
+	balls = [_Ball(random.randint(0, 1200), random.randint(0, 800)) for i in range(32)]
+	n = 100
+	for count in (8, 16, 32, 64):
+		players = makePlayers(count)
+		for name, f in (("getCollisions (batched)", lambda: getCollisions(players, balls)),
+				("same test per pair, box check", lambda: unbatched(players, True)),
+				("same test per pair, no box check", lambda: unbatched(players, False)),
+				("old getCollision per pair", lambda: oldMath(players)),
+				("getMaskCollisions", lambda: getMaskCollisions(players, balls))):
+			t = timeit.timeit(f, number=n)
+			print("%2d cursors x 32 balls, %-34s %.3f ms" % (count, name + ":", t / n * 1000))
+
+	screen = pygame.display.set_mode((1200, 800))
+	n = 1000
+	for count in (8, 64):
+		players = makePlayers(count)
+		_sprites.clear()
+		for p in players:
+			prerender(p.color)
+		t = timeit.timeit(lambda: [pygame.draw.polygon(screen, pygame.Color(*p.color), p.L)
+			for p in players], number=n)
+		print("draw %2d cursors with draw.polygon:   %.3f ms" % (count, t / n * 1000))
+		t = timeit.timeit(lambda: [p.draw(screen) for p in players], number=n)
+		print("draw %2d cursors with cached sprites: %.3f ms" % (count, t / n * 1000))
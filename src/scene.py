@@ -21,8 +21,9 @@ class Scene():
         f = pygame.font.SysFont('Comic Sans MS', 30)
         t1_size = f.size("Click anywhere to start playing!")
         t1 = f.render("Click anywhere to start playing!", False, (0, 230, 172))
-        t2_size = f.size("Press 'p' to pause and 'e' to exit.")
-        t2 = f.render("Press 'p' to pause and 'e' to exit.", False, (0, 230, 172))
+        keys = "Press 'p' to pause, 'c' to toggle pixel mask collisions and 'e' to exit."
+        t2_size = f.size(keys)
+        t2 = f.render(keys, False, (0, 230, 172))
        
         pygame.draw.rect(screen, pygame.Color(204, 255, 220), self.board)
         screen.blit(t1, (self.w/2 - t1_size[0]/2,self.h/2 - 2*t1_size[1]))
@@ -34,7 +35,7 @@ class Scene():
         moveS = "Toggle goals by pressing m. The current state is %s"%moving
         t3_size = f.size(moveS)
         t3 = f.render(moveS,False, (0, 230, 172))
-        screen.blit(t3, (self.w/2 - t2_size[0]*.80,50))
+        screen.blit(t3, (self.w/2 - t3_size[0]/2,50))
 
         #pygame.draw.rect(screen, pygame.Color(0, 0, 0), (400,650,150,50))
         #pygame.draw.rect(screen, pygame.Color(0, 0, 0), (650,650,150,50))
@@ -56,7 +57,11 @@ class Scene():
     def drawGame(self, screen, scores):
         pygame.font.init()
         f = pygame.font.SysFont('Comic Sans MS', 30)
-        s_left = f.render("Score: " + str(scores[0]), False, (0, 0, 0))
+        if len(scores) == 1:
+            s_left = f.render("Score: " + str(scores[0]), False, (0, 0, 0))
+        else:
+            s = "   ".join("P%d: %d" % (i + 1, score) for i, score in enumerate(scores))
+            s_left = f.render(s, False, (0, 0, 0))
         left = pygame.Rect(0, 0, self.w/2, self.h)
         right = pygame.Rect(self.w/2, 0, self.w, self.h)
         pygame.draw.rect(screen, pygame.Color(173, 235, 235), left)
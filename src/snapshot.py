@@ -0,0 +1,306 @@
+# packs the whole match into a small binary blob and puts it back again
+import random
+import struct
+
+#OVERVIEW:
+#data = takeSnapshot(game) grabs the balls, goals, players, scores, scene and rng
+#restoreSnapshot(game, data) writes it all back into the same game object
+#decodeMatch(data) reads a snapshot or a packMatch frame into plain values
+#without needing a game, that's what spectators use
+#the goals, balls and players have to already exist (same count and same
+#still/moving goals as when the snapshot was taken), restoring only moves them
+#around, it never makes new sprites. Anything that doesn't fit raises ValueError
+#before the game is touched
+
+VERSION = 4
+MODES = ("start", "game", "end")
+#players and scores are counted in a byte and ball owners are stored as owner + 1
+MAX_PLAYERS = 255
+
+#version, mode, paused, number of balls, goals, players and scores, then the
+#board width and height
+_HEADER = struct.Struct("<BB?BBBBHH")
+#xCenter, yCenter, xSpeed, ySpeed, radius, owner + 1 (0 when nobody has hit it yet)
+_BALL = struct.Struct("<4dBB")
+#moving?, x, y, speed (speed is 0 for a still goal), goalWidth, goalHeight
+_GOAL = struct.Struct("<?5d")
+#the 7 points of L, then x, y, size, turn, whether the angle is complex yet
+#(it starts as 0 and becomes a complex number after the first rotation)
+#and the angle as real + imaginary parts
+_PLAYER = struct.Struct("<14d2dii?2d")
+_SCORE = struct.Struct("<i")
+#mersenne twister state (624 words + index), then gauss_next
+_RNG = struct.Struct("<625I?d")
+
+
+def packMatch(game):
+    s = game.s
+    balls = game.balls.sprites()
+    goals = game.goals.sprites() if game.goals is not None else []
+    parts = [_HEADER.pack(VERSION, MODES.index(s.mode), s.paused, len(balls),
+                          len(goals), len(game.players), len(game.scores),
+                          int(game.width), int(game.height))]
+    for b in balls:
+        owner = 0 if b.owner is None else b.owner + 1
+        parts.append(_BALL.pack(b.xCenter, b.yCenter, b.xSpeed, b.ySpeed,
+                                b.radius, owner))
+    for g in goals:
+        speed = getattr(g, "speed", None)
+        parts.append(_GOAL.pack(speed is not None, g.x, g.y, speed or 0,
+                                g.goalWidth, g.goalHeight))
+    for p in game.players:
+        angle = complex(p.angle)
+        points = [c for point in p.L for c in point]
+        parts.append(_PLAYER.pack(*(points + [p.x, p.y, p.size, p.turn,
+                                              isinstance(p.angle, complex),
+                                              angle.real, angle.imag])))
+    for score in game.scores:
+        parts.append(_SCORE.pack(score))
+    return b"".join(parts)
+
+
+def packRng():
+    version, internal, gauss = random.getstate()
+    return _RNG.pack(*(internal + (gauss is not None, gauss or 0.0)))
+
+
+def takeSnapshot(game):
+    return packMatch(game) + packRng()
+
+
+def _matchSize(nBalls, nGoals, nPlayers, nScores):
+    return (_HEADER.size + nBalls*_BALL.size + nGoals*_GOAL.size +
+            nPlayers*_PLAYER.size + nScores*_SCORE.size)
+
+
+def _readHeader(view):
+    if len(view) < _HEADER.size:
+        raise ValueError("snapshot is too short for a header")
+    header = _HEADER.unpack_from(view, 0)
+    if header[0] != VERSION:
+        raise ValueError("unknown snapshot version %d" % header[0])
+    if header[1] >= len(MODES):
+        raise ValueError("unknown scene mode %d" % header[1])
+    return header
+
+
+def decodeMatch(data):
+    view = memoryview(data)
+    version, mode, paused, nBalls, nGoals, nPlayers, nScores, width, height = \
+        _readHeader(view)
+    if len(view) < _matchSize(nBalls, nGoals, nPlayers, nScores):
+        raise ValueError("snapshot is cut off")
+    offset = _HEADER.size
+    match = {"mode": MODES[mode], "paused": paused, "width": width,
+             "height": height, "balls": [], "goals": [], "players": [],
+             "scores": []}
+    for i in range(nBalls):
+        x, y, xSpeed, ySpeed, radius, owner = _BALL.unpack_from(view, offset)
+        offset += _BALL.size
+        match["balls"].append({"xCenter": x, "yCenter": y, "xSpeed": xSpeed,
+                               "ySpeed": ySpeed, "radius": radius,
+                               "owner": owner - 1 if owner else None})
+    for i in range(nGoals):
+        moving, x, y, speed, goalWidth, goalHeight = _GOAL.unpack_from(view, offset)
+        offset += _GOAL.size
+        match["goals"].append({"moving": moving, "x": x, "y": y,
+                               "speed": speed if moving else None,
+                               "goalWidth": goalWidth, "goalHeight": goalHeight})
+    for i in range(nPlayers):
+        values = _PLAYER.unpack_from(view, offset)
+        offset += _PLAYER.size
+        match["players"].append({
+            "L": [(values[k], values[k+1]) for k in range(0, 14, 2)],
+            "x": values[14], "y": values[15], "size": values[16],
+            "turn": values[17],
+            "angle": complex(values[19], values[20]) if values[18] else 0})
+    for i in range(nScores):
+        match["scores"].append(_SCORE.unpack_from(view, offset)[0])
+        offset += _SCORE.size
+    return match
+
+
+def restoreSnapshot(game, data):
+    view = memoryview(data)
+    version, mode, paused, nBalls, nGoals, nPlayers, nScores, width, height = \
+        _readHeader(view)
+    balls = game.balls.sprites()
+    goals = game.goals.sprites() if game.goals is not None else []
+    if (nBalls != len(balls) or nGoals != len(goals) or
+            nPlayers != len(game.players) or nScores != len(game.scores)):
+        raise ValueError("snapshot does not match the sprites in this game")
+    offset = _HEADER.size
+    end = _matchSize(nBalls, nGoals, nPlayers, nScores)
+    #the rng state is optional (packMatch leaves it out) but never half there
+    if len(view) != end and len(view) != end + _RNG.size:
+        raise ValueError("snapshot is %d bytes, expected %d or %d" %
+                         (len(view), end, end + _RNG.size))
+    for i, g in enumerate(goals):
+        moving = _GOAL.unpack_from(view, offset + nBalls*_BALL.size + i*_GOAL.size)[0]
+        if moving != hasattr(g, "speed"):
+            raise ValueError("snapshot does not match the sprites in this game")
+
+    for b in balls:
+        b.xCenter, b.yCenter, b.xSpeed, b.ySpeed, radius, owner = \
+            _BALL.unpack_from(view, offset)
+        b.owner = owner - 1 if owner else None
+        b.getRect()
+        offset += _BALL.size
+    for g in goals:
+        moving, g.x, g.y, speed, goalWidth, goalHeight = \
+            _GOAL.unpack_from(view, offset)
+        if moving:
+            g.speed = speed
+        g.getRect()
+        offset += _GOAL.size
+
+    for p in game.players:
+        values = _PLAYER.unpack_from(view, offset)
+        offset += _PLAYER.size
+        p.L = [(values[i], values[i+1]) for i in range(0, 14, 2)]
+        p.x, p.y, p.size, p.turn = values[14], values[15], values[16], values[17]
+        if values[18]:
+            p.angle = complex(values[19], values[20])
+        else:
+            p.angle = 0
+
+    for i in range(nScores):
+        game.scores[i] = _SCORE.unpack_from(view, offset)[0]
+        offset += _SCORE.size
+
+    game.s.mode = MODES[mode]
+    game.s.paused = paused
+
+    if len(view) > offset:
+        values = _RNG.unpack_from(view, offset)
+        gauss = values[626] if values[625] else None
+        random.setstate((3, values[:625], gauss))
+
+
+if __name__ == '__main__':
+    #round trip checks and a quick benchmark: python snapshot.py
+    import os
+    import timeit
+    import copy
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main
+    import ball
+    import goal
+
+    pygame.display.set_mode((600, 400))
+
+    def makeGame(numPlayers, moving):
+        game = main.BallHogz(600, 400, numPlayers=numPlayers)
+        game.init()
+        game.moving = moving
+        game.drawBalls(None)
+        game.drawGoals(None)
+        return game
+
+    #everything a snapshot is supposed to carry, as plain values
+    def state(game):
+        return ([(b.xCenter, b.yCenter, b.xSpeed, b.ySpeed, b.owner, tuple(b.rect))
+                 for b in game.balls.sprites()],
+                [(g.x, g.y, getattr(g, "speed", None), tuple(g.rect))
+                 for g in game.goals.sprites()],
+                [(list(p.L), p.x, p.y, p.size, p.turn, p.angle) for p in game.players],
+                list(game.scores), game.s.mode, game.s.paused, random.getstate())
+
+    def scramble(game):
+        for i in range(37):
+            game.goals.update(game.width, game.height)
+            game.balls.update(game.width, game.height)
+        for p in game.players:
+            p.update(p.x + 13, p.y - 7)
+            p.scale(-1)
+            p.rotateRight()
+        game.balls.sprites()[0].owner = 1
+        game.scores[-1] += 5
+        game.s.mode = "end"
+        game.s.paused = not game.s.paused
+        random.random()
+
+    for moving in (True, False):
+        game = makeGame(3, moving)
+        game.s.mode = "game"
+        for i, p in enumerate(game.players):
+            p.update(100 + 150*i, 120 + 40*i)
+            p.scale(i)
+            for k in range(i + 1):
+                p.rotateLeft()
+        game.balls.sprites()[0].owner = 2 if moving else None
+        game.scores[:] = [3, -1, 7]
+        game.goals.update(game.width, game.height)
+
+        data = takeSnapshot(game)
+        before = state(game)
+        scramble(game)
+        restoreSnapshot(game, data)
+        assert state(game) == before, "restoring into the same game changed it"
+        assert takeSnapshot(game) == data
+
+        match = decodeMatch(data)
+        assert match == decodeMatch(packMatch(game))
+        assert [(b["xCenter"], b["owner"]) for b in match["balls"]] == \
+            [(b[0], b[4]) for b in before[0]]
+        assert [g["speed"] for g in match["goals"]] == [g[2] for g in before[1]]
+        assert [(p["L"], p["turn"], p["angle"]) for p in match["players"]] == \
+            [(p[0], p[4], p[5]) for p in before[2]]
+        assert (match["scores"], match["mode"], match["width"]) == \
+            (before[3], before[4], game.width)
+
+        other = makeGame(3, moving)
+        restoreSnapshot(other, data)
+        assert state(other) == before, "restoring into another game changed it"
+
+        #the mode is the second byte of the header
+        badMode = data[:1] + bytes([len(MODES)]) + data[2:]
+        for bad in (data[:-1], data[:-_RNG.size + 10], data + b"x", badMode):
+            try:
+                restoreSnapshot(other, bad)
+            except ValueError:
+                pass
+            else:
+                assert False, "a broken snapshot was restored"
+        try:
+            decodeMatch(badMode)
+        except ValueError:
+            pass
+        else:
+            assert False, "a frame with an unknown mode was decoded"
+        try:
+            restoreSnapshot(makeGame(3, not moving), data)
+        except ValueError:
+            pass
+        else:
+            assert False, "moving goals were restored into still ones"
+        assert state(other) == before, "a rejected snapshot changed the game"
+    print("round trips ok")
+
+    n = 10000
+    t = timeit.timeit(lambda: takeSnapshot(game), number=n)
+    print("snapshot: %d bytes, %.2f us" % (len(data), t / n * 1e6))
+    t = timeit.timeit(lambda: restoreSnapshot(game, data), number=n)
+    print("restore:  %.2f us" % (t / n * 1e6))
+
+    #what saving the match took without snapshots: copy.deepcopy can't copy
+    #the pygame surfaces, so the sprites get built again and their fields copied
+    def copyByHand(game):
+        balls = []
+        for b in game.balls.sprites():
+            c = ball.Ball(b.xCenter, b.yCenter)
+            c.xSpeed, c.ySpeed, c.owner = b.xSpeed, b.ySpeed, b.owner
+            balls.append(c)
+        goals = []
+        for g in game.goals.sprites():
+            if hasattr(g, "speed"):
+                goals.append(goal.MovingGoal(g.goalWidth, g.goalHeight, g.x, g.y, g.speed))
+            else:
+                goals.append(goal.Goal(g.goalWidth, g.goalHeight, g.x, g.y))
+        return (balls, goals, copy.deepcopy(game.players), list(game.scores),
+                game.s.mode, game.s.paused, random.getstate())
+
+    n = 1000
+    t = timeit.timeit(lambda: copyByHand(game), number=n)
+    print("copying the sprites by hand: %.2f us" % (t / n * 1e6))
@@ -0,0 +1,65 @@
+# read-only window for watching a match streamed by broadcast.SpectatorServer
+import socket
+import sys
+import pygame
+import broadcast
+import snapshot
+import player
+import scene
+
+#OVERVIEW:
+#python3 spectator.py [host] [port] connects to a running game (by default
+#127.0.0.1:5112) and draws every frame it gets. It only reads, nothing the
+#spectator does goes back to the game.
+
+def drawMatch(screen, s, match):
+    #same order as BallHogz.redrawAll
+    s.mode = match["mode"]
+    s.paused = match["paused"]
+    s.moving = any(g["moving"] for g in match["goals"])
+    s.draw(screen, match["scores"])
+    if s.mode == "game":
+        for g in match["goals"]:
+            pygame.draw.rect(screen, (255,255,255),
+                (g["x"] - g["goalWidth"], g["y"] - g["goalHeight"],
+                 2 * g["goalWidth"], 2 * g["goalHeight"]))
+        for b in match["balls"]:
+            pygame.draw.circle(screen, (255,255,112),
+                (int(b["xCenter"]), int(b["yCenter"])), b["radius"])
+    for i, p in enumerate(match["players"]):
+        player.drawCursor(screen, p["size"], p["turn"], player.playerColor(i),
+            p["x"], p["y"])
+
+def run(host="127.0.0.1", port=5112):
+    sock = socket.create_connection((host, port))
+    frame = broadcast.recvFrame(sock)
+    if frame is None:
+        print("the game closed the connection")
+        return
+    match = snapshot.decodeMatch(frame)
+    pygame.init()
+    screen = pygame.display.set_mode((match["width"], match["height"]))
+    pygame.display.set_caption("Watching Ball Hogz")
+    s = scene.Scene(match["width"], match["height"], False)
+
+    watching = True
+    while watching and frame is not None:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                watching = False
+        match = snapshot.decodeMatch(frame)
+        screen.fill((255, 255, 255))
+        drawMatch(screen, s, match)
+        pygame.display.flip()
+        frame = broadcast.recvFrame(sock)
+
+    sock.close()
+    pygame.quit()
+
+def main():
+    host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5112
+    run(host, port)
+
+if __name__ == '__main__':
+    main()